@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+"""
+Generate both feeds in one process so interpreter startup, DNS
+resolution and the TLS session to the instance are paid once; see
+mastodon_feed.py.
+"""
+from mastodon_feed import main
+
+if __name__ == "__main__":
+    main(kind="bookmarks")
+    main(kind="statuses")
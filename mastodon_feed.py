@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Shared implementation for the Mastodon RSS generators.
+
+fetch_bookmarks.py and fetch_statuses.py used to carry near-identical
+copies of the HTML helpers, pagination and RSS builder; they are now
+thin shims over this module so each fix lands once and a single
+interpreter/requests import is paid per run.
+"""
+import functools
+import html
+import json
+import os
+import pathlib
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import lxml.html as _lxml_html
+except ImportError:  # pragma: no cover - minimal environments
+    _lxml_html = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - minimal environments
+    orjson = None
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - minimal environments
+    httpx = None
+
+# Decode response bytes directly; orjson is a C decoder and skips
+# requests' encoding re-detection in Response.json().
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Configuration from environment (set as GitHub Secrets)
+INSTANCE_URL = os.environ.get("MASTODON_INSTANCE_URL", "").rstrip("/")
+ACCESS_TOKEN = os.environ.get("MASTODON_ACCESS_TOKEN", "")
+
+if not INSTANCE_URL or not ACCESS_TOKEN:
+    print("Missing MASTODON_INSTANCE_URL or MASTODON_ACCESS_TOKEN", file=sys.stderr)
+    sys.exit(1)
+
+_SESSION_HEADERS = {
+    "Authorization": f"Bearer {ACCESS_TOKEN}",
+    "Accept": "application/json",
+    # sent by default anyway; pin it so Mastodon always compresses
+    "Accept-Encoding": "gzip, deflate",
+}
+
+
+def _make_session():
+    """
+    Build the shared HTTP client. Prefers httpx — with HTTP/2 when the
+    h2 extra is installed — which multiplexes the concurrent page
+    fetches over one TLS connection; falls back to a requests.Session
+    with a tuned pool and retry policy when httpx isn't installed.
+    httpx transports only retry connection errors, so the status-code
+    backoff for that client lives in _get below.
+    """
+    if httpx is not None:
+        try:
+            import h2  # noqa: F401
+            http2 = True
+        except ImportError:
+            http2 = False
+        transport = httpx.HTTPTransport(
+            http2=http2,
+            retries=5,
+            limits=httpx.Limits(max_keepalive_connections=8, max_connections=8),
+        )
+        return httpx.Client(
+            transport=transport, headers=_SESSION_HEADERS, timeout=30.0
+        )
+
+    session = requests.Session()
+    session.headers.update(_SESSION_HEADERS)
+    # Size the pool for the concurrent page fetches and retry transient
+    # failures instead of crashing the scheduled job.
+    retry = Retry(
+        total=5,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+SESSION = _make_session()
+
+# Transient statuses worth backing off on, matching the requests Retry.
+_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+def _get(url: str):
+    """
+    GET through the shared session, backing off on transient statuses.
+    urllib3's Retry already does this inside the requests fallback; this
+    loop provides the same resilience for the httpx client.
+    """
+    for attempt in range(5):
+        r = SESSION.get(url, timeout=30)
+        if r.status_code not in _RETRY_STATUSES:
+            return r
+        time.sleep(0.3 * (2 ** attempt))
+    return r
+
+
+# Public URL of your GitHub Pages site (for fallback links)
+PAGES_BASE_URL = "https://pcmhatre.github.io/mastodon-bookmarks-rss/"  # <-- change YOUR-USERNAME
+
+# Shared executor for overlapping HTTP round-trips with page processing.
+# requests.Session is thread-safe for GETs.
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Items requested per API page (Mastodon's maximum).
+_PAGE_LIMIT = 40
+
+# Precompiled pattern for Mastodon's small, well-formed HTML fragments.
+# One alternation matches an anchor-with-href, any other tag, or a text run,
+# so a single C-level scan yields both the plain text and the first link.
+_FUSED_RE = re.compile(
+    r"""<a\b[^>]*?\bhref\s*=\s*["']([^"']+)["'][^>]*>|<[^>]+>|([^<]+)""",
+    re.IGNORECASE,
+)
+
+
+def _extract(html_text: str) -> tuple[str, str | None]:
+    """Strip tags and find the first <a href> in one pass over the HTML."""
+    parts: list[str] = []
+    href = None
+    for m in _FUSED_RE.finditer(html_text or ""):
+        if m.group(1):
+            if href is None:
+                href = m.group(1)
+        elif m.group(2):
+            parts.append(m.group(2))
+    text = "".join(parts)
+    if "&" in text:
+        text = html.unescape(text)
+    if href is not None and "&" in href:
+        # Attribute values carry entities too (&amp; in query strings)
+        href = html.unescape(href)
+    return text, href
+
+
+def strip_html(html_text: str) -> str:
+    """Remove HTML tags and return plain text."""
+    return _extract(html_text)[0]
+
+
+def extract_first_link(html_text: str) -> str | None:
+    """Extract the first <a href="..."> link from HTML, if any."""
+    return _extract(html_text)[1]
+
+
+def _parse(html_text: str) -> tuple[str, str | None]:
+    """
+    Tokenize the HTML once and return (plain_text, first_href).
+    Uses lxml (C-level libxml2) when available; falls back to the
+    regex helpers above on minimal environments.
+    """
+    if not html_text:
+        return "", None
+    if "<" not in html_text:
+        # Already plain text; at most unescape entities.
+        if "&" in html_text:
+            html_text = html.unescape(html_text)
+        return html_text, None
+    if _lxml_html is not None:
+        tree = _lxml_html.fragment_fromstring(html_text, create_parent="div")
+        hrefs = tree.xpath(".//a/@href") if "<a" in html_text.lower() else None
+        return tree.text_content(), hrefs[0] if hrefs else None
+    return _extract(html_text)
+
+
+# One C-level pass instead of five chained str.replace walks.
+_XML_ESCAPE = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    '"': "&quot;",
+    "'": "&apos;",
+})
+
+
+def escape_xml(text: str) -> str:
+    """Escape special XML characters."""
+    return text.translate(_XML_ESCAPE)
+
+
+@functools.lru_cache(maxsize=4)
+def _escaped_instance(instance: str) -> str:
+    """The channel link never varies within a run; escape it once."""
+    return escape_xml(instance)
+
+
+@functools.lru_cache(maxsize=64)
+def _escaped_fallback(template: str, handle: str) -> str:
+    """Escaped '... @handle' fallback text, cached per handle."""
+    return escape_xml(template.format(handle=handle))
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_iso(dt_str: str) -> datetime | None:
+    """
+    Parse a Mastodon ISO-8601 timestamp, or None when malformed.
+    Cached so repeated timestamps cost one parse.
+    """
+    try:
+        return datetime.fromisoformat(
+            dt_str[:-1] + "+00:00" if dt_str.endswith("Z") else dt_str
+        )
+    except Exception:
+        return None
+
+
+# Matches <url>; rel="next" (and the unquoted rel=next variant) in one scan.
+_LINK_RE = re.compile(r'<([^>]+)>\s*;\s*rel="?([^",]+)"?')
+
+
+def _find_next_link(header: str | None) -> str | None:
+    """
+    Find the rel="next" URL in Mastodon's HTTP Link header, if any.
+    Example:
+      <https://.../api/v1/accounts/ID/statuses?max_id=123>; rel="next"
+    Only "next" is ever consumed, so stop at the first match.
+    """
+    for m in _LINK_RE.finditer(header or ""):
+        if m.group(2) == "next":
+            return m.group(1)
+    return None
+
+
+def next_page_url(base_url: str, data: list[dict], link_header: str | None) -> str | None:
+    """
+    Derive the next page URL from the batch's minimum id, falling back to
+    the Link header when the ids aren't sortable.
+
+    Only valid for the statuses endpoint, where max_id cursors are status
+    ids. /api/v1/bookmarks paginates by internal bookmark ids, so its
+    callers must follow the Link header instead.
+    """
+    ids = [st.get("id") for st in data]
+    if ids and all(isinstance(i, str) and i.isdigit() for i in ids):
+        max_id = min(int(i) for i in ids) - 1
+        return f"{base_url}&max_id={max_id}"
+    return _find_next_link(link_header)
+
+
+def _next_min_id_url(base_url: str, data: list[dict]) -> str | None:
+    """
+    Forward continuation of a min_id fetch: advance the cursor past the
+    newest id in the batch. A short page means we've caught up.
+    """
+    if len(data) < _PAGE_LIMIT:
+        return None
+    ids = [st.get("id") for st in data]
+    if not ids or not all(isinstance(i, str) and i.isdigit() for i in ids):
+        return None
+    return f"{base_url}&min_id={max(int(i) for i in ids)}"
+
+
+# Highest status id emitted by a previous run; lets the statuses fetch ask
+# the server for only the new window via min_id (persisted across CI runs).
+_LAST_ID_FILE = pathlib.Path(".state/last_id.txt")
+
+
+def _read_last_id() -> str | None:
+    try:
+        value = _LAST_ID_FILE.read_text().strip()
+    except OSError:
+        return None
+    return value if value.isdigit() else None
+
+
+def _write_last_id(statuses: list[dict]) -> None:
+    ids = [st.get("id") for st in statuses]
+    ids = [i for i in ids if isinstance(i, str) and i.isdigit()]
+    if not ids:
+        return
+    _LAST_ID_FILE.parent.mkdir(exist_ok=True)
+    _LAST_ID_FILE.write_text(str(max(int(i) for i in ids)))
+
+
+# The account id never changes, so cache it on disk and skip the
+# verify_credentials round-trip on subsequent runs.
+_ACCOUNT_ID_CACHE = pathlib.Path(".cache/account_id.json")
+
+
+def get_own_account_id(instance: str) -> str:
+    """Use /api/v1/accounts/verify_credentials to get your own account ID."""
+    try:
+        cached = json.loads(_ACCOUNT_ID_CACHE.read_text())
+        if cached.get("instance") == instance and cached.get("id"):
+            return str(cached["id"])
+    except (OSError, ValueError):
+        pass
+
+    url = f"{instance}/api/v1/accounts/verify_credentials"
+    r = _get(url)
+    r.raise_for_status()
+    data = _json_loads(r.content)
+    account_id = data.get("id")
+    if not account_id:
+        print("Could not determine account ID from verify_credentials", file=sys.stderr)
+        sys.exit(1)
+
+    _ACCOUNT_ID_CACHE.parent.mkdir(exist_ok=True)
+    _ACCOUNT_ID_CACHE.write_text(json.dumps({"instance": instance, "id": str(account_id)}))
+    return str(account_id)
+
+
+def fetch_bookmarks(instance: str, max_items: int):
+    """
+    Fetch up to max_items bookmarks from the Mastodon API, following pagination.
+    Bookmarks paginate by internal bookmark ids (not the status ids in the
+    payload), so the Link header is the only valid cursor here. The next
+    page request is dispatched to the executor before the current batch is
+    processed, so the round-trip overlaps with local work.
+    """
+    base_url = f"{instance}/api/v1/bookmarks?limit={_PAGE_LIMIT}"
+    results: list[dict] = []
+
+    future = _EXECUTOR.submit(_get, base_url)
+    while future is not None and len(results) < max_items:
+        r = future.result()
+        r.raise_for_status()
+        data = _json_loads(r.content)
+        if not isinstance(data, list) or not data:
+            break
+
+        # Kick off the next round-trip before consuming this batch
+        future = None
+        if len(results) + len(data) < max_items:
+            url = _find_next_link(r.headers.get("Link"))
+            if url:
+                future = _EXECUTOR.submit(_get, url)
+
+        results.extend(data)
+
+    return results[:max_items]
+
+
+def fetch_statuses(instance: str, max_items: int):
+    """
+    Fetch up to max_items of YOUR OWN STATUSES:
+      - Excludes reblogs/boosts
+      - Excludes replies
+      - Excludes direct messages
+      - Only keeps posts from the last 24 hours
+    The next page request is dispatched to the executor before the current
+    batch is filtered, so the round-trip overlaps with local work (at the
+    cost of at most one speculative request past the cutoff).
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=1)
+
+    account_id = get_own_account_id(instance)
+
+    # exclude_reblogs=true → drops boosts
+    # exclude_replies=true → drops replies
+    base_url = (
+        f"{instance}/api/v1/accounts/{account_id}/statuses"
+        f"?limit={_PAGE_LIMIT}&exclude_reblogs=true&exclude_replies=true"
+    )
+
+    # Filter server-side to statuses newer than the last run's high-water
+    # mark; the cutoff check below stays as a safety net for stale state.
+    last_id = _read_last_id()
+
+    results: list[dict] = []
+    reached_cutoff = False
+
+    url = f"{base_url}&min_id={last_id}" if last_id else base_url
+    future = _EXECUTOR.submit(_get, url)
+    while future is not None and len(results) < max_items and not reached_cutoff:
+        r = future.result()
+        r.raise_for_status()
+        data = _json_loads(r.content)
+        if not isinstance(data, list) or not data:
+            break
+
+        # Kick off the next round-trip before filtering this batch.
+        # A min_id fetch returns the window just newer than the cursor and
+        # must continue forward (advancing min_id); only the cold-start
+        # path pages backwards with max_id.
+        future = None
+        if last_id:
+            url = _next_min_id_url(base_url, data)
+        else:
+            url = next_page_url(base_url, data, r.headers.get("Link"))
+        if url:
+            future = _EXECUTOR.submit(_get, url)
+
+        for st in data:
+            # Skip direct messages (DMs)
+            if st.get("visibility") == "direct":
+                continue
+
+            created_at_str = st.get("created_at")
+            created_at = (_parse_iso(created_at_str) if created_at_str else None) or now
+
+            if created_at < cutoff:
+                if last_id:
+                    # Forward pagination: newer items follow, just skip
+                    continue
+                # Backward pagination: everything after this is older
+                reached_cutoff = True
+                break
+
+            results.append(st)
+            if len(results) >= max_items:
+                break
+
+    if last_id:
+        # Forward pages arrive oldest window first; the feed wants
+        # newest first, and truncation should drop the oldest items.
+        ids = [st.get("id") for st in results]
+        if all(isinstance(i, str) and i.isdigit() for i in ids):
+            results.sort(key=lambda st: int(st["id"]), reverse=True)
+
+    return results[:max_items]
+
+
+# Per-feed wording, output path and behavior differences between the
+# bookmarks and statuses generators.
+FEEDS = {
+    "bookmarks": {
+        "max_env": "MAX_BOOKMARKS",
+        "fetch": fetch_bookmarks,
+        "output": "mastodon-bookmarks.xml",
+        "guid_prefix": "bookmark",
+        "fallback_handle": "unknown",
+        "fallback_text": "Bookmark from @{handle}",
+        # Bookmarks arrive unfiltered; drop anything older than 24h here.
+        "cutoff_in_build": True,
+        "channel_title": "Mastodon Bookmarks RSS (last 24h)",
+        "channel_description": "RSS feed generated from my Mastodon bookmarks (last 24 hours)",
+        "fetching_msg": "Fetching up to {max_items} bookmarks from {instance} ...",
+        "fetched_msg": "Fetched {count} bookmarks",
+    },
+    "statuses": {
+        "max_env": "MAX_STATUSES",
+        "fetch": fetch_statuses,
+        "output": "mastodon-statuses.xml",
+        "guid_prefix": "status",
+        "fallback_handle": "me",
+        "fallback_text": "Post by @{handle}",
+        # fetch_statuses already applies the 24h cutoff.
+        "cutoff_in_build": False,
+        "channel_title": "Mastodon Posts RSS (last 24h, no replies/boosts)",
+        "channel_description": "RSS feed generated from my Mastodon posts (last 24 hours, originals only)",
+        "fetching_msg": (
+            "Fetching up to {max_items} statuses from {instance} "
+            "(no replies, no boosts, last 24 hours only) ..."
+        ),
+        "fetched_msg": "Fetched {count} statuses after filtering",
+    },
+}
+
+
+def _format_item(st: dict, feed: dict, now: datetime, now_rfc822: str,
+                 cutoff: datetime) -> str | None:
+    """Format one status as an <item> chunk, or None when filtered out."""
+    if feed["cutoff_in_build"]:
+        # Filter by created_at – skip items older than 24 hours
+        created_at_str = st.get("created_at")
+        created_at = (_parse_iso(created_at_str) if created_at_str else None) or now
+        if created_at < cutoff:
+            return None
+
+    content_html = st.get("content") or ""
+    content_text, external_link = _parse(content_html)
+    content_text = content_text.strip()
+
+    # Prefer the external URL (the thing being posted/bookmarked),
+    # otherwise fallback to your Pages index.
+    link = external_link or PAGES_BASE_URL
+
+    account = st.get("account") or {}
+    handle = account.get("acct") or feed["fallback_handle"]
+
+    # Title: spoiler/CW if present, else first line, else fallback
+    spoiler = (st.get("spoiler_text") or "").strip()
+    if spoiler:
+        title = spoiler
+    elif content_text:
+        title = content_text.split("\n", 1)[0]
+    else:
+        title = feed["fallback_text"].format(handle=handle)
+
+    if len(title) > 120:
+        title = title[:117] + "..."
+
+    if content_text:
+        description_esc = escape_xml(content_text)
+    else:
+        description_esc = _escaped_fallback(feed["fallback_text"], handle)
+
+    # Stable GUID per item
+    guid = escape_xml(f"{feed['guid_prefix']}-{st.get('id')}")
+
+    # pubDate = time of this run (good for IFTTT freshness)
+    return (
+        f'<item>\n'
+        f'  <title>{escape_xml(title)}</title>\n'
+        f'  <link>{escape_xml(link)}</link>\n'
+        f'  <guid isPermaLink="false">{guid}</guid>\n'
+        f'  <pubDate>{now_rfc822}</pubDate>\n'
+        f'  <description>{description_esc}</description>\n'
+        f'</item>'
+    )
+
+
+def write_rss(path: str, instance: str, statuses: list[dict], kind: str) -> None:
+    """
+    Stream an RSS 2.0 feed to path: channel header, one chunk per item,
+    footer — no whole-feed string is ever materialized. The file is
+    written to a .tmp sibling and moved into place atomically so feed
+    readers never see a partial feed.
+    Note: no XML declaration; IFTTT-friendly.
+    """
+    feed = FEEDS[kind]
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=1)
+    # Every item shares this run's timestamp; format it once.
+    now_rfc822 = now.strftime("%a, %d %b %Y %H:%M:%S GMT")
+
+    header = (
+        f'<rss version="2.0">\n'
+        f'<channel>\n'
+        f'  <title>{feed["channel_title"]}</title>\n'
+        f'  <link>{_escaped_instance(instance)}</link>\n'
+        f'  <description>{feed["channel_description"]}</description>\n'
+        f'  <lastBuildDate>{now_rfc822}</lastBuildDate>'
+    )
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.encode("utf-8"))
+        for st in statuses:
+            item = _format_item(st, feed, now, now_rfc822, cutoff)
+            if item is not None:
+                f.write(b"\n")
+                f.write(item.encode("utf-8"))
+        f.write(b"\n</channel>\n</rss>\n")
+    os.replace(tmp_path, path)
+
+
+def main(kind: str) -> None:
+    feed = FEEDS[kind]
+    raw_max = os.environ.get(feed["max_env"], "").strip()
+    max_items = int(raw_max) if raw_max.isdigit() else 80
+
+    print(
+        feed["fetching_msg"].format(max_items=max_items, instance=INSTANCE_URL),
+        file=sys.stderr,
+    )
+    statuses = feed["fetch"](INSTANCE_URL, max_items)
+    print(feed["fetched_msg"].format(count=len(statuses)), file=sys.stderr)
+
+    output_path = feed["output"]
+    write_rss(output_path, INSTANCE_URL, statuses, kind)
+
+    if kind == "statuses":
+        _write_last_id(statuses)
+
+    print(f"Wrote RSS to {output_path}", file=sys.stderr)